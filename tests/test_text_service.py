@@ -0,0 +1,70 @@
+"""Exercise the ImageMagick batch path with a stub `magick` binary"""
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_generator
+from moviepy.config import change_settings, get_setting
+
+# Accepts -version, and for -script writes a small PNG for every -write target
+STUB_MAGICK = """#!{python}
+import shlex, sys
+from PIL import Image
+if sys.argv[1] == '-version':
+    sys.exit(0)
+for line in open(sys.argv[2]):
+    tokens = shlex.split(line)
+    if '-write' in tokens:
+        path = tokens[tokens.index('-write') + 1].split(':', 1)[1]
+        Image.new('RGBA', (30, 20), (255, 0, 0, 255)).save(path)
+"""
+
+
+@pytest.fixture
+def stub_magick(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    magick = bin_dir / 'magick'
+    magick.write_text(STUB_MAGICK.format(python=sys.executable))
+    magick.chmod(magick.stat().st_mode | stat.S_IEXEC)
+
+    original_binary = get_setting('IMAGEMAGICK_BINARY')
+    change_settings({'IMAGEMAGICK_BINARY': str(bin_dir / 'convert')})
+    monkeypatch.setattr(video_generator, '_text_service', None)
+    video_generator._cached_textclip.cache_clear()
+    yield magick
+    change_settings({'IMAGEMAGICK_BINARY': original_binary})
+    video_generator._cached_textclip.cache_clear()
+
+
+def test_start_text_service_returns_service(stub_magick, tmp_path):
+    service = video_generator.start_text_service(str(tmp_path / 'text'))
+    assert isinstance(service, video_generator.ImageMagickService)
+    assert video_generator._text_service is service
+
+
+def test_labels_render_through_service(stub_magick, tmp_path):
+    service = video_generator.start_text_service(str(tmp_path / 'text'))
+    args = ('Paris', 40, '#FFFFFF', 'NoSuchFont', None, 0, (300, None), 'center')
+    path = service.submit(*args)
+    service.flush()
+    assert os.path.isfile(path)
+
+    # Labels without a font file go through the service instead of TextClip
+    clip = video_generator._cached_textclip(*args)
+    assert clip.size == (30, 20)
+
+
+def test_start_text_service_without_magick(tmp_path, monkeypatch):
+    original_binary = get_setting('IMAGEMAGICK_BINARY')
+    change_settings({'IMAGEMAGICK_BINARY': str(tmp_path / 'convert')})
+    monkeypatch.setattr(video_generator, '_text_service', None)
+    try:
+        assert video_generator.start_text_service(str(tmp_path / 'text')) is None
+        assert video_generator._text_service is None
+    finally:
+        change_settings({'IMAGEMAGICK_BINARY': original_binary})
@@ -1,10 +1,41 @@
-from moviepy.editor import TextClip, CompositeVideoClip, ColorClip, concatenate_videoclips, AudioFileClip, concatenate_audioclips, ImageClip
-from moviepy.config import change_settings
+from moviepy.editor import TextClip, CompositeVideoClip, AudioFileClip, ImageClip, AudioClip, VideoClip, CompositeAudioClip
+from moviepy.config import change_settings, get_setting
 import json
 import os
 import textwrap
+import functools
+import gc
+import hashlib
+import multiprocessing
+import platform
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
 import numpy as np
 from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont
+
+# orjson parses large question files several times faster; fall back to the
+# standard library when it isn't installed. Files are opened in binary mode,
+# which both accept, so nothing is decoded to str first
+try:
+    import orjson
+    
+    def _load_json(file):
+        return orjson.loads(file.read())
+except ImportError:
+    _load_json = json.load
+
+# OpenCV resizes images much faster than Pillow; it's optional
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Media and font paths in the settings are relative to the application root
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Configure MoviePy to use ImageMagick
 # if os.name == 'nt':  # for Windows
@@ -13,15 +44,70 @@ from pathlib import Path
 # Update the Mac path - this is typically the correct path when installed via Homebrew
 change_settings({"IMAGEMAGICK_BINARY": r"/opt/homebrew/bin/convert"})
 
+def check_pillow_simd():
+    """Warn if the stock Pillow build is in use instead of Pillow-SIMD"""
+    version = getattr(Image, '__version__', '')
+    if 'post' not in version and 'simd' not in version.lower():
+        print(f"Note: Pillow {version} detected; install pillow-simd for faster resizing and compositing")
+        return False
+    print(f"Using Pillow-SIMD {version}")
+    return True
+
+@functools.lru_cache(maxsize=256)
+def hex_to_rgb(hex_color):
+    """Convert a '#RRGGBB' color string to an (r, g, b) tuple"""
+    value = int(hex_color.lstrip('#'), 16)
+    return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+def is_hex_color(value):
+    """Whether value is an 'RRGGBB' color string, with or without '#'"""
+    if not isinstance(value, str):
+        return False
+    digits = value[1:] if value.startswith('#') else value
+    return len(digits) == 6 and all(c in string.hexdigits for c in digits)
+
+def to_pil_color(color):
+    """Convert a hex color to an (r, g, b) tuple for Pillow, which needs the '#'"""
+    return hex_to_rgb(color) if is_hex_color(color) else color
+
+def add_rgb_colors(node):
+    """Store a parsed '_rgb' tuple next to every hex 'color' setting.
+
+    Colors are 'RRGGBB' with an optional '#'. The original hex strings are
+    kept since TextClip takes colors as strings.
+    """
+    if isinstance(node, dict):
+        color = node.get('color')
+        if is_hex_color(color):
+            node['_rgb'] = hex_to_rgb(color)
+        for value in node.values():
+            add_rgb_colors(value)
+    elif isinstance(node, list):
+        for value in node:
+            add_rgb_colors(value)
+    return node
+
+def compile_settings(settings):
+    """Precompute values derived from settings that clip builders reuse.
+
+    Adds '_rgb' tuples next to hex colors, the resolved '_font_file' and the
+    shadow '_offset', so they aren't recomputed for every clip.
+    """
+    add_rgb_colors(settings)
+    settings['font_directories'] = tuple(settings.get('font_directories', ()))
+    get_font_file(settings)
+    shadow = settings.get('text', {}).get('shadow')
+    if shadow:
+        shadow['_offset'] = (shadow['offset']['x'], shadow['offset']['y'])
+    return settings
+
 def load_settings():
     """Load settings and project settings"""
-    # Get the root directory of the application
-    root_dir = os.path.dirname(os.path.abspath(__file__))
-    print(f"Root directory: {root_dir}")
+    print(f"Root directory: {ROOT_DIR}")
     
     # Load main settings file
-    with open('settings.json', 'r') as file:
-        main_settings = json.load(file)
+    with open('settings.json', 'rb') as file:
+        main_settings = _load_json(file)
     
     # Get project paths
     project_settings_path = main_settings['project']
@@ -33,8 +119,8 @@ def load_settings():
     project_end_path = main_settings.get('project_end', '')
     
     # Load project settings
-    with open(project_settings_path, 'r') as file:
-        project_settings = json.load(file)
+    with open(project_settings_path, 'rb') as file:
+        project_settings = _load_json(file)
     
     # Add bookend paths to project settings
     project_settings['project_intro'] = project_intro_path
@@ -46,15 +132,15 @@ def load_settings():
         '/System/Library/Fonts/',  # macOS System
         'C:\\Windows\\Fonts\\',  # Windows
         '/usr/share/fonts/',  # Linux
-        os.path.join(os.path.dirname(__file__), 'fonts/')  # Local fonts directory
+        os.path.join(ROOT_DIR, 'fonts/')  # Local fonts directory
     ])
     
     # Load questions
     questions_path = os.path.join(project_dir, project_settings['questions_file'])
     print(f"Questions path: {questions_path}")
     
-    with open(questions_path, 'r') as file:
-        questions_data = json.load(file)
+    with open(questions_path, 'rb') as file:
+        questions_data = _load_json(file)
     
     # Debug print settings before path updates
     print(f"Background image before: {project_settings.get('background_image', 'Not set')}")
@@ -62,58 +148,102 @@ def load_settings():
     # Update paths to be relative to root directory for media files
     if 'background_image' in project_settings:
         if project_settings['background_image']:  # Only update if not empty
-            project_settings['background_image'] = os.path.join(root_dir, project_settings['background_image'].lstrip('/'))
+            project_settings['background_image'] = os.path.join(ROOT_DIR, project_settings['background_image'].lstrip('/'))
             print(f"Background image after: {project_settings['background_image']}")
         else:
             project_settings['background_image'] = ''  # Ensure it's an empty string
             print("Background image is empty, using color background")
     
     if 'audio' in project_settings and 'file' in project_settings['audio']:
-        project_settings['audio']['file'] = os.path.join(root_dir, project_settings['audio']['file'].lstrip('/'))
+        project_settings['audio']['file'] = os.path.join(ROOT_DIR, project_settings['audio']['file'].lstrip('/'))
         print(f"Audio file path: {project_settings['audio']['file']}")
     
     if 'timer' in project_settings and 'sound' in project_settings['timer']:
-        project_settings['timer']['sound']['file'] = os.path.join(root_dir, project_settings['timer']['sound']['file'].lstrip('/'))
+        project_settings['timer']['sound']['file'] = os.path.join(ROOT_DIR, project_settings['timer']['sound']['file'].lstrip('/'))
         print(f"Timer sound path: {project_settings['timer']['sound']['file']}")
     
+    compile_settings(project_settings)
+    
     return project_settings, questions_data, project_dir
 
+@functools.lru_cache(maxsize=None)
+def get_text_wrapper(width):
+    """Return a shared TextWrapper for width instead of building one per call"""
+    return textwrap.TextWrapper(width=width)
+
+@functools.lru_cache(maxsize=1024)
 def wrap_text(text, width):
     """Wrap text to specified width"""
-    return '\n'.join(textwrap.wrap(text, width=width))
+    # Short single-line text (most answers) needs no wrapping
+    if len(text) <= width and text.isprintable():
+        return text.rstrip()
+    return '\n'.join(get_text_wrapper(width).wrap(text))
+
+@functools.lru_cache(maxsize=1024)
+def wrap_text_pixels(text, font_file, fontsize, max_width, max_chars):
+    """Wrap text so every line fits in max_width pixels in the given font.
+
+    Lines are also kept to max_chars characters (the wrap_width setting).
+    Words wider than either limit get a line of their own, as with wrap_text.
+    """
+    font = load_font(font_file[0], font_file[1], fontsize)
+    lines = []
+    line = ''
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if line and (len(candidate) > max_chars or font.getlength(candidate) > max_width):
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return '\n'.join(lines)
+
+# Named positions along each axis, as functions of (video size, clip size, padding)
+_X_POSITIONS = {
+    'center': lambda video, clip, padding: 'center',
+    'left': lambda video, clip, padding: padding,
+    'right': lambda video, clip, padding: video - clip - padding,
+}
+_Y_POSITIONS = {
+    'center': lambda video, clip, padding: 'center',
+    'top': lambda video, clip, padding: padding,
+    'bottom': lambda video, clip, padding: video - clip - padding,
+}
+
+def _resolve_axis(setting, resolvers, video_size, clip_size, padding, pixels):
+    resolver = resolvers.get(setting)
+    if resolver is not None:
+        value = resolver(video_size, clip_size, padding)
+    else:
+        try:
+            value = int(setting)  # Pixel offset, possibly given as a string
+        except (TypeError, ValueError):
+            value = 'center'
+    if pixels and value == 'center':
+        return (video_size - clip_size) // 2
+    return value
+
+def _resolve_xy(position, clip_size, video_size, pixels=False):
+    """Resolve a {'x', 'y', 'padding'} position setting to a MoviePy position.
+
+    With pixels, 'center' is resolved to an offset too, for callers that
+    draw the clip themselves instead of going through set_position.
+    """
+    padding = position.get('padding', 20)
+    return (
+        _resolve_axis(position.get('x', 'center'), _X_POSITIONS, video_size[0], clip_size[0], padding, pixels),
+        _resolve_axis(position.get('y', 'center'), _Y_POSITIONS, video_size[1], clip_size[1], padding, pixels)
+    )
 
 def get_text_position(settings, clip_type, clip_width, clip_height, video_width, video_height):
     """Calculate text position based on settings"""
-    position = settings['text'][clip_type]['position']
-    x_setting = position.get('x', 'center')
-    y_setting = position.get('y', 'center')
-    padding = position.get('padding', 20)
-    
-    # Calculate x position
-    if isinstance(x_setting, (int, float)) or str(x_setting).isdigit():
-        x_pos = int(x_setting)  # Convert to int if it's a string number
-    elif x_setting == "center":
-        x_pos = 'center'
-    elif x_setting == "left":
-        x_pos = padding
-    elif x_setting == "right":
-        x_pos = video_width - clip_width - padding
-    else:
-        x_pos = 'center'
-    
-    # Calculate y position
-    if isinstance(y_setting, (int, float)) or str(y_setting).isdigit():
-        y_pos = int(y_setting)  # Convert to int if it's a string number
-    elif y_setting == "center":
-        y_pos = 'center'
-    elif y_setting == "top":
-        y_pos = padding
-    elif y_setting == "bottom":
-        y_pos = video_height - clip_height - padding
-    else:
-        y_pos = 'center'
-    
-    return (x_pos, y_pos)
+    return _resolve_xy(
+        settings['text'][clip_type]['position'],
+        (clip_width, clip_height),
+        (video_width, video_height)
+    )
 
 def get_font_path(font_name, settings):
     """Get the full path for a font name"""
@@ -128,14 +258,284 @@ def get_font_path(font_name, settings):
     
     return base_font_name
 
-def create_text_clip(text, duration, clip_type='question', settings=None):
-    wrapped_text = wrap_text(text, settings['text']['wrap_width'])
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf')
+
+def _normalize_font_name(name):
+    return name.replace(' ', '').replace('-', '').replace('_', '').lower()
+
+@functools.lru_cache(maxsize=None)
+def resolve_font_file(font_name, font_directories):
+    """Find the font file and face index for a font name.
+
+    Accepts a font file path, a "Family:index" name (e.g. "Phosphate:1") or a
+    "Family-Style" name (e.g. "Phosphate-Solid"). Returns (path, index), or
+    None when no matching file is found in font_directories.
+    """
+    if os.path.isfile(font_name):
+        return font_name, 0
+    
+    font_parts = font_name.split(':')
+    full_name = _normalize_font_name(font_parts[0])
+    index = int(font_parts[1]) if len(font_parts) > 1 and font_parts[1].isdigit() else None
+    family, _, style = font_parts[0].rpartition('-')
+    family = _normalize_font_name(family)
+    
+    for directory in font_directories:
+        directory = os.path.join(ROOT_DIR, directory)
+        if not os.path.isdir(directory):
+            continue
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in sorted(filenames):
+                stem, ext = os.path.splitext(filename)
+                if ext.lower() not in FONT_EXTENSIONS:
+                    continue
+                path = os.path.join(dirpath, filename)
+                stem = _normalize_font_name(stem)
+                if stem == full_name:
+                    return path, index or 0
+                if family and stem == family:
+                    # Pick the face of a collection whose style matches
+                    face = 0
+                    while True:
+                        try:
+                            font = ImageFont.truetype(path, 12, index=face)
+                        except OSError:
+                            break
+                        if _normalize_font_name(font.getname()[1]) == _normalize_font_name(style):
+                            return path, face
+                        face += 1
+    return None
+
+def get_font_file(settings):
+    """Return the resolved (path, index) of the text font, or None"""
+    text_settings = settings['text']
+    if '_font_file' not in text_settings:
+        text_settings['_font_file'] = resolve_font_file(
+            text_settings['font'], tuple(settings.get('font_directories', ()))
+        )
+    return text_settings['_font_file']
+
+@functools.lru_cache(maxsize=64)
+def load_font(font_path, index, fontsize):
+    """Load a FreeType font; cached so each face and size is parsed once"""
+    return ImageFont.truetype(font_path, fontsize, index=index)
+
+def render_text_to_array(text, font_file, fontsize, color, stroke_color=None, stroke_width=0, size=None, align='center', shadow=None):
+    """Render a label to an RGBA uint8 array with Pillow, in-process.
+
+    Mirrors ImageMagick's label: the canvas is the text size unless a
+    width/height is given, and lines are aligned per align (gravity).
+    shadow is an optional (color, (x_offset, y_offset)) drawn underneath the
+    text in the same buffer; the canvas grows by the offset to fit it.
+    """
+    font = load_font(font_file[0], font_file[1], fontsize)
+    stroke_width = stroke_width if stroke_color else 0
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent + 2 * stroke_width
+    
+    lines = text.split('\n')
+    line_widths = [int(np.ceil(font.getlength(line))) + 2 * stroke_width for line in lines]
+    text_width = max(line_widths)
+    text_height = line_height * len(lines)
+    
+    width = size[0] if size and size[0] else text_width
+    height = size[1] if size and size[1] else text_height
+    
+    shadow_x, shadow_y = shadow[1] if shadow else (0, 0)
+    origin_x, origin_y = max(0, -shadow_x), max(0, -shadow_y)
+    
+    image = Image.new('RGBA', (width + abs(shadow_x), height + abs(shadow_y)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    
+    # Line origins, aligned per gravity
+    gravity = align.lower()
+    y = (height - text_height) // 2 if height != text_height else 0
+    origins = []
+    for line_width in line_widths:
+        if gravity in ('west', 'left', 'northwest', 'southwest'):
+            x = 0
+        elif gravity in ('east', 'right', 'northeast', 'southeast'):
+            x = width - line_width
+        else:
+            x = (width - line_width) // 2
+        origins.append((origin_x + x + stroke_width, origin_y + y + stroke_width))
+        y += line_height
+    
+    # Shadow first so the text is drawn over it
+    if shadow:
+        for line, (x, y) in zip(lines, origins):
+            draw.text((x + shadow_x, y + shadow_y), line, font=font, fill=to_pil_color(shadow[0]))
+    
+    for line, (x, y) in zip(lines, origins):
+        draw.text(
+            (x, y),
+            line,
+            font=font,
+            fill=to_pil_color(color),
+            stroke_width=stroke_width,
+            stroke_fill=to_pil_color(stroke_color)
+        )
+    
+    return np.array(image)
+
+class ImageMagickService:
+    """Render text labels with one ImageMagick process per batch.
+
+    Every TextClip starts its own `convert` process, which costs more than
+    the render itself for short labels. Labels are queued with submit() and
+    rendered together by flush() through `magick -script`. Each label is
+    written to a PNG named after a hash of its arguments in cache_dir, so
+    worker processes pointed at the same directory reuse the renders.
+    """
+    
+    def __init__(self, cache_dir, binary):
+        self.cache_dir = cache_dir
+        self.binary = binary
+        self.pending = {}
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def path_for(self, args):
+        """Return the PNG path a set of label arguments renders to"""
+        digest = hashlib.sha1(repr(args).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+    
+    def submit(self, text, fontsize, color, font, stroke_color, stroke_width, size, align, font_file=None, shadow=None):
+        """Queue a label for the next flush and return its PNG path"""
+        args = (text, fontsize, color, font, stroke_color, stroke_width, size, align)
+        path = self.path_for(args)
+        if not os.path.exists(path):
+            self.pending[path] = args
+        return path
+    
+    @staticmethod
+    def _quote(value):
+        return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+    
+    def flush(self):
+        """Render every queued label with a single ImageMagick process"""
+        if not self.pending:
+            return
+        
+        lines = []
+        for path, args in self.pending.items():
+            text, fontsize, color, font, stroke_color, stroke_width, size, align = args
+            # Read the text from a file, as TextClip does, to avoid quoting issues
+            text_path = path[:-len('.png')] + '.txt'
+            with open(text_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            
+            options = [
+                '-background', 'transparent',
+                '-fill', self._quote(color),
+                '-font', self._quote(font),
+                '-pointsize', str(fontsize),
+            ]
+            if size is not None:
+                options += ['-size', f"{size[0] or ''}x{size[1] or ''}"]
+            else:
+                options += ['+size']
+            if stroke_color is not None:
+                options += ['-stroke', self._quote(stroke_color), '-strokewidth', str(stroke_width)]
+            else:
+                options += ['+stroke']
+            options += [
+                '-gravity', align,
+                self._quote(f"label:@{text_path}"),
+                '-write', self._quote(f"PNG32:{path}"),
+                '+delete'
+            ]
+            lines.append(' '.join(options))
+        lines.append('-exit')
+        
+        # Workers may flush at the same time, so each batch gets its own script
+        fd, script_path = tempfile.mkstemp(suffix='.txt', dir=self.cache_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        
+        try:
+            subprocess.run([self.binary, '-script', script_path], check=True)
+        finally:
+            self.pending.clear()
+            os.remove(script_path)
+    
+    def render(self, *args):
+        """Return an ImageClip of a label, rendering it if needed"""
+        path = self.submit(*args)
+        self.flush()
+        return ImageClip(path, transparent=True)
+
+# Shared text service, set up by start_text_service(); without it labels
+# are rendered one TextClip at a time
+_text_service = None
+
+def start_text_service(cache_dir):
+    """Route label rendering through an ImageMagickService in cache_dir"""
+    global _text_service
+    # magick lives next to the configured convert binary in ImageMagick 7
+    binary = os.path.join(os.path.dirname(get_setting("IMAGEMAGICK_BINARY")), 'magick')
+    try:
+        subprocess.run([binary, '-version'], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Warning: ImageMagick batch rendering unavailable, using TextClip: {str(e)}")
+        return None
+    _text_service = ImageMagickService(cache_dir, binary)
+    _cached_textclip.cache_clear()
+    return _text_service
+
+def make_textclip(text, fontsize, color, font, stroke_color, stroke_width, size, align, font_file=None, shadow=None):
+    """Render a label clip.
+
+    Labels are drawn in-process with Pillow when the font resolved to a file
+    (font_file), including the optional shadow; otherwise they go through
+    ImageMagick, whose batch service keeps each render on disk, and ignore
+    shadow.
+    """
+    if font_file is not None:
+        array = render_text_to_array(text, font_file, fontsize, color, stroke_color, stroke_width, size, align, shadow)
+        return ImageClip(array, transparent=True)
+    
+    if _text_service is not None:
+        try:
+            return _text_service.render(text, fontsize, color, font, stroke_color, stroke_width, size, align)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: ImageMagick batch render failed, using TextClip: {str(e)}")
     
+    return TextClip(
+        text,
+        fontsize=fontsize,
+        color=color,
+        font=font,
+        method='label',
+        align=align,
+        size=size,
+        bg_color='transparent',
+        stroke_color=stroke_color,
+        stroke_width=stroke_width
+    )
+
+@functools.lru_cache(maxsize=64)
+def _cached_textclip(*args):
+    """Render a label clip once per unique set of make_textclip arguments.
+
+    Only for labels that repeat, like the timer digits (one per second of
+    the countdown, so a small cache holds them all); question and answer
+    text is unique per video and would only pin memory here.
+    Callers must copy the returned clip before changing its attributes.
+    """
+    return make_textclip(*args)
+
+def get_text_clip_args(text, clip_type, settings):
+    """Return the _cached_textclip arguments for a text and its shadow.
+
+    Returns (main_args, shadow_args, max_width, shadow_offset);
+    shadow_args is None when the shadow is disabled or drawn as part of the
+    main text (Pillow), and shadow_offset is None when it is disabled.
+    """
     # Get text settings
     font_size = settings['text']['size'][clip_type]
     font_name = settings['text']['font']
     font = get_font_path(font_name, settings)
-    print(f"Creating text clip with font: {font}")
+    font_file = get_font_file(settings)
     
     text_color = settings['text']['color']
     shadow_enabled = settings['text']['shadow']['enabled']
@@ -162,42 +562,94 @@ def create_text_clip(text, duration, clip_type='question', settings=None):
     # Create size tuple based on dimensions
     size = (max_width, max_height) if max_width or max_height else None
     
+    # Wrap at wrap_width characters, and also at the box width in pixels
+    # when Pillow can measure the font, so no line is clipped by the box
+    stroke_width = settings['text'].get('outline', {}).get('thickness', 2) if outline_enabled else 0
+    if font_file is not None and max_width:
+        wrapped_text = wrap_text_pixels(
+            text, font_file, font_size, max_width - 2 * stroke_width, settings['text']['wrap_width']
+        )
+    else:
+        wrapped_text = wrap_text(text, settings['text']['wrap_width'])
+    
+    main_args = (
+        wrapped_text,
+        font_size,
+        text_color,
+        font,
+        settings['text'].get('outline', {}).get('color', '#000000') if outline_enabled else None,
+        stroke_width,
+        size,  # Now using both width and height if specified
+        settings['text']['alignment'],
+        font_file
+    )
+    
+    shadow_args = None
+    shadow_offset = None
+    if shadow_enabled:
+        shadow_settings = settings['text']['shadow']
+        shadow_offset = shadow_settings.get('_offset') or (shadow_settings['offset']['x'], shadow_settings['offset']['y'])
+    
+    if shadow_enabled and font_file is not None:
+        # Pillow draws the shadow into the same buffer as the text
+        main_args += ((shadow_settings['color'], shadow_offset),)
+    elif shadow_enabled:
+        shadow_args = (
+            wrapped_text,
+            font_size,
+            settings['text']['shadow']['color'],
+            font,
+            None,
+            0,
+            (max_width, None),
+            settings['text']['alignment'],
+            font_file
+        )
+    
+    return main_args, shadow_args, max_width, shadow_offset
+
+def shadow_reuses_text(main_args, shadow_args):
+    """Whether the shadow label only differs from the main label in color.
+
+    That's the case without an outline or fixed height; the shadow can then
+    be the main label's mask filled with the shadow color instead of a
+    second ImageMagick render.
+    """
+    return (
+        main_args[:2] == shadow_args[:2]
+        and main_args[3:] == shadow_args[3:]
+        and is_hex_color(shadow_args[2])
+    )
+
+def recolor_text_clip(clip, color):
+    """Return the label clip's mask filled with a hex color"""
+    width, height = clip.size
+    return ImageClip(make_color_array(hex_to_rgb(color), width, height)).set_mask(clip.mask)
+
+def create_text_clip(text, duration, clip_type='question', settings=None, fade=True):
+    main_args, shadow_args, max_width, shadow_offset = get_text_clip_args(text, clip_type, settings)
+    font = main_args[3]
+    print(f"Creating text clip with font: {font}")
+    
     # Create main text clip with transparent background
     try:
-        main_clip = TextClip(
-            wrapped_text, 
-            fontsize=font_size, 
-            color=text_color, 
-            font=font,
-            method='label',
-            align=settings['text']['alignment'],
-            size=size,  # Now using both width and height if specified
-            bg_color='transparent',
-            stroke_color=settings['text'].get('outline', {}).get('color', '#000000') if outline_enabled else None,
-            stroke_width=settings['text'].get('outline', {}).get('thickness', 2) if outline_enabled else 0
-        )
+        main_clip = make_textclip(*main_args)
         print(f"Successfully created text clip with font: {font}")
-        if size:
+        if main_args[6]:
             print(f"Text clip dimensions: {main_clip.size}")
     except Exception as e:
         print(f"Error creating text clip with font {font}: {str(e)}")
         raise
     
-    if shadow_enabled:
-        # Create shadow clip
-        shadow_clip = TextClip(wrapped_text,
-                             fontsize=font_size,
-                             color=settings['text']['shadow']['color'],
-                             font=font,
-                             method='label',
-                             align=settings['text']['alignment'],
-                             size=(max_width, None),
-                             bg_color='transparent')
+    if shadow_args:
+        # Create shadow clip, recoloring the main label when the shapes match
+        if shadow_reuses_text(main_args, shadow_args) and main_clip.mask is not None:
+            shadow_clip = recolor_text_clip(main_clip, shadow_args[2])
+        else:
+            shadow_clip = make_textclip(*shadow_args)
         
         # Offset shadow
-        x_offset = settings['text']['shadow']['offset']['x']
-        y_offset = settings['text']['shadow']['offset']['y']
-        shadow_clip = shadow_clip.set_position(lambda t: (x_offset, y_offset))
+        shadow_clip = shadow_clip.set_position(shadow_offset)
         
         # Combine shadow and main text
         combined_clip = CompositeVideoClip([shadow_clip, main_clip])
@@ -220,108 +672,255 @@ def create_text_clip(text, duration, clip_type='question', settings=None):
     # Set position, duration and fade
     combined_clip = combined_clip.set_position(position)
     combined_clip = combined_clip.set_duration(duration)
-    combined_clip = combined_clip.crossfadein(settings['transitions']['duration'])
+    if fade:
+        combined_clip = combined_clip.crossfadein(settings['transitions']['duration'])
     
     return combined_clip
 
-def create_timer_clip(duration, start_time, settings):
-    # Get timer settings
+def get_timer_shape_settings(settings):
+    """Return the active timer shape type and its settings block"""
     shape_type = settings['timer'].get('shape', 'circle')
     if shape_type == 'circle':
-        shape_settings = settings['timer']['circle']
-    else:
-        shape_settings = settings['timer']['square']
-    
-    size = shape_settings['size']
-    shape_color = shape_settings['color'].lstrip('#')
-    position = shape_settings['position']
-    text_color = settings['timer']['text']['color']
-    
-    # Get video dimensions for positioning
-    video_width = settings['video']['width']
-    
-    # Create shape background with alpha channel (RGBA)
-    shape_surface = np.zeros((size, size, 4))
+        return shape_type, settings['timer']['circle']
+    return shape_type, settings['timer']['square']
+
+@functools.lru_cache(maxsize=None)
+def build_timer_shape_array(shape_type, size, rgb_color):
+    """Build the timer background shape as an RGBA uint8 array.
+
+    The shape is identical for every tick of every question, so the mask is
+    only computed once per (shape, size, color).
+    """
+    # Create shape background with alpha channel (RGBA), fully transparent
+    shape_surface = np.zeros((size, size, 4), dtype=np.uint8)
     
     if shape_type == 'circle':
-        # Create circular mask
+        # Create circular mask, comparing squared distances to skip the sqrt
         center = size // 2
         y, x = np.ogrid[:size, :size]
-        dist_from_center = np.sqrt((x - center)**2 + (y - center)**2)
-        shape_mask = dist_from_center <= center
+        shape_mask = (x - center)**2 + (y - center)**2 <= center * center
         
-        # Set alpha to 0 (transparent) everywhere except the circle
-        shape_surface[..., 3] = 0
-        shape_surface[shape_mask, 3] = 255
+        # Color and make opaque only the pixels inside the circle
+        shape_surface[shape_mask] = rgb_color + (255,)
     else:
-        # Create square mask (full surface)
-        shape_mask = np.ones((size, size), dtype=bool)
-        shape_surface[..., 3] = 255
-    
-    # Convert hex color to RGB and set shape color
-    rgb_color = tuple(int(shape_color[i:i+2], 16) for i in (0, 2, 4))
-    shape_surface[shape_mask, 0:3] = rgb_color
+        # Square fills the whole surface
+        shape_surface[...] = rgb_color + (255,)
     
-    # Create shape clip with transparency
-    shape_clip = ImageClip(shape_surface, ismask=False, transparent=True).set_duration(1)
-    
-    # Create timer text with proper font
-    timer_text = str(int(duration - start_time))
+    return shape_surface
+
+@functools.lru_cache(maxsize=None)
+def build_timer_shape(shape_type, size, rgb_color):
+    """Build the timer background shape as a transparent ImageClip"""
+    shape_surface = build_timer_shape_array(shape_type, size, rgb_color)
+    return ImageClip(shape_surface, ismask=False, transparent=True).set_duration(1)
+
+def get_digit_clip_args(n, settings):
+    """Return the _cached_textclip arguments for the timer number n"""
     font_name = settings['text']['font']
     font = get_font_path(font_name, settings)  # Pass settings to get_font_path
+    font_file = get_font_file(settings)
     
-    text_clip = TextClip(
-        timer_text, 
-        fontsize=settings['text']['size']['timer'], 
-        color=text_color,
-        font=font,  # Use resolved font path
-        method='label',
-        align='center',
-        bg_color='transparent'
+    return (
+        str(n),
+        settings['text']['size']['timer'],
+        settings['timer']['text']['color'],
+        font,  # Use resolved font path
+        None,
+        0,
+        None,
+        'center',
+        font_file
     )
+
+def build_digit_clip(n, settings):
+    """Build the timer text clip for the number n"""
+    return _cached_textclip(*get_digit_clip_args(n, settings))
+
+def prerender_texts(service, questions, settings):
+    """Render every question, answer and timer label in one ImageMagick batch.
+
+    Labels whose font resolved to a file are drawn with Pillow on demand
+    and are skipped here.
+    """
+    labels = []
+    for qa in questions:
+        for text, clip_type in ((qa['question'], 'question'), (qa['answer'], 'answer')):
+            main_args, shadow_args, _, _ = get_text_clip_args(clean_text(text), clip_type, settings)
+            labels.append(main_args)
+            if shadow_args and not shadow_reuses_text(main_args, shadow_args):
+                labels.append(shadow_args)
     
-    # Center text on shape
-    text_clip = text_clip.set_position(('center', 'center'))
+    q_duration = settings['timing']['question_duration']
+    for n in range(1, q_duration + 1):
+        labels.append(get_digit_clip_args(n, settings))
     
-    # Combine shape and text
-    combined_clip = CompositeVideoClip(
-        [shape_clip, text_clip],
-        size=(size, size)
+    for args in labels:
+        # Skip labels with a font_file; Pillow draws those
+        if args[8] is None:
+            service.submit(*args)
+    if not service.pending:
+        return
+    
+    print(f"Rendering {len(service.pending)} text labels in one batch")
+    try:
+        service.flush()
+    except (OSError, subprocess.CalledProcessError) as e:
+        # Labels that didn't render are retried one by one on demand
+        print(f"Warning: ImageMagick batch render failed: {str(e)}")
+
+@functools.lru_cache(maxsize=None)
+def _get_timer_stamp(n, font_file, fontsize, text_color, shape_type, size, rgb_color):
+    """Composite the number n onto the timer shape as an RGBA uint8 array"""
+    shape_image = Image.fromarray(build_timer_shape_array(shape_type, size, rgb_color))
+    digit = render_text_to_array(str(n), font_file, fontsize, text_color)
+    
+    # Center the number on the shape; paste clips anything outside it
+    layer = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    layer.paste(Image.fromarray(digit), ((size - digit.shape[1]) // 2, (size - digit.shape[0]) // 2))
+    return np.array(Image.alpha_composite(shape_image, layer))
+
+def prebuild_timer_frames(q_duration, settings):
+    """Pre-composite the timer shape and each number into RGBA stamps.
+
+    Returns {n: (size, size, 4) uint8 array} for n in 1..q_duration, so a
+    tick is a single ImageClip instead of a shape/text composite. Stamps
+    are memoized, so every question in a process shares the same arrays.
+    Returns None when the font doesn't resolve to a file and the numbers
+    have to be rendered by ImageMagick.
+    """
+    font_file = get_font_file(settings)
+    if font_file is None:
+        return None
+    
+    shape_type, shape_settings = get_timer_shape_settings(settings)
+    return {
+        n: _get_timer_stamp(
+            n,
+            font_file,
+            settings['text']['size']['timer'],
+            settings['timer']['text']['color'],
+            shape_type,
+            shape_settings['size'],
+            shape_settings['_rgb']
+        )
+        for n in range(1, q_duration + 1)
+    }
+
+def get_timer_position(settings, pixels=False):
+    """Calculate the timer position in the video from the shape settings"""
+    _, shape_settings = get_timer_shape_settings(settings)
+    size = shape_settings['size']
+    return _resolve_xy(
+        shape_settings['position'],
+        (size, size),
+        (settings['video']['width'], settings['video']['height']),
+        pixels
     )
+
+@functools.lru_cache(maxsize=4)
+def _tick_audio(path, volume):
+    """Open the tick sound once per process; every tick shares its reader"""
+    tick_sound = AudioFileClip(path)
+    if volume:
+        tick_sound = tick_sound.volumex(volume)
+    return tick_sound
+
+def load_tick_sound(settings):
+    """Load the timer tick sound, or return None if it is disabled or missing"""
+    if not settings['timer'].get('sound', {}).get('enabled', False):
+        return None
+    sound_file = settings['timer']['sound'].get('file')
+    if not sound_file or not os.path.exists(sound_file):
+        return None
+    try:
+        return _tick_audio(sound_file, settings['timer']['sound'].get('volume'))
+    except Exception as e:
+        print(f"Warning: Could not load timer sound: {str(e)}")
+        return None
+
+def create_tick_audio(q_duration, settings):
+    """Create a tick at the start of every second, or None if disabled"""
+    tick_sound = load_tick_sound(settings)
+    if tick_sound is None:
+        return None
+    tick = tick_sound.set_duration(min(1, tick_sound.duration))
+    return CompositeAudioClip([tick.set_start(i) for i in range(q_duration)]).set_duration(q_duration)
+
+def create_countdown_clip(static_track, timer_frames, q_duration, settings):
+    """Draw the countdown straight onto the static question frames.
+
+    Replaces a CompositeVideoClip of the static track and a timer layer:
+    the stamps are premultiplied by their alpha once, so each frame only
+    blends the timer's square in numpy and MoviePy's compositor is skipped.
+    """
+    w = settings['video']['width']
+    h = settings['video']['height']
+    fade_duration = settings['transitions']['duration']
+    size = timer_frames[q_duration].shape[0]
     
-    # Calculate position
-    x_setting = position.get('x', 'center')
-    if x_setting == "center":
-        pos = ('center', position['y'])
-    else:
-        padding = position.get('padding', 20)
-        if isinstance(x_setting, (int, float)):
-            x_pos = x_setting
-        elif x_setting == "left":
-            x_pos = padding
-        elif x_setting == "right":
-            x_pos = video_width - size - padding
-        else:
-            x_pos = "center"
-        pos = (x_pos, position['y'])
+    x, y = get_timer_position(settings, pixels=True)
+    
+    # Only blend the part of the stamp that lands inside the frame
+    x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + size, w), min(y + size, h)
+    if x0 >= x1 or y0 >= y1:
+        return static_track
+    stamp_area = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    alphas = {n: stamp[stamp_area][:, :, 3:] / np.float32(255) for n, stamp in timer_frames.items()}
+    colors = {n: stamp[stamp_area][:, :, :3] * alphas[n] for n, stamp in timer_frames.items()}
     
-    # Position the combined timer in the video
-    combined_clip = combined_clip.set_position(pos)
+    def make_frame(t):
+        frame = static_track.get_frame(t)
+        if t >= q_duration:
+            return frame
+        
+        # Second i of the question shows the number q_duration - i
+        n = q_duration - min(int(t), q_duration - 1)
+        alpha, color = alphas[n], colors[n]
+        if fade_duration > 0 and t < fade_duration:
+            # Same as crossfadein on the timer layer
+            k = t / fade_duration
+            alpha, color = alpha * k, color * k
+        
+        # The static frames are shared between calls, so blend into a copy
+        frame = frame.copy()
+        frame[y0:y1, x0:x1] = frame[y0:y1, x0:x1] * (1 - alpha) + color
+        return frame
+    
+    return VideoClip(make_frame, duration=static_track.duration)
+
+def create_timer_clip(duration, start_time, settings, shape_clip=None, digit_clip=None):
+    """Create the timer clip for one second of the countdown.
+
+    Used when the font can only be rendered by ImageMagick. shape_clip and
+    digit_clip may be passed in pre-built (see build_timer_shape /
+    build_digit_clip) to avoid rebuilding them per tick.
+    """
+    # Get timer settings
+    shape_type, shape_settings = get_timer_shape_settings(settings)
+    size = shape_settings['size']
+    
+    if shape_clip is None:
+        shape_clip = build_timer_shape(shape_type, size, shape_settings['_rgb'])
+    
+    # Create timer text with proper font
+    if digit_clip is None:
+        digit_clip = build_digit_clip(int(duration - start_time), settings)
+    
+    # Center text on shape and combine; set_position returns a copy, so the
+    # shared digit clip is left untouched
+    combined_clip = CompositeVideoClip(
+        [shape_clip, digit_clip.set_position(('center', 'center'))],
+        size=(size, size)
+    )
     
     # Add timer sound if enabled
-    if settings['timer'].get('sound', {}).get('enabled', False):
-        sound_file = settings['timer']['sound'].get('file')
-        if sound_file and os.path.exists(sound_file):
-            try:
-                tick_sound = AudioFileClip(sound_file)
-                if settings['timer']['sound'].get('volume'):
-                    tick_sound = tick_sound.volumex(settings['timer']['sound']['volume'])
-                combined_clip = combined_clip.set_audio(tick_sound)
-            except Exception as e:
-                print(f"Warning: Could not load timer sound: {str(e)}")
-    
-    # Set duration BEFORE applying crossfade
-    combined_clip = combined_clip.set_duration(1)
+    tick_sound = load_tick_sound(settings)
+    if tick_sound is not None:
+        combined_clip = combined_clip.set_audio(tick_sound)
+    
+    # Position the timer in the video and set duration BEFORE applying
+    # crossfade (after the audio, so it is trimmed to the tick as well)
+    combined_clip = combined_clip.set_position(get_timer_position(settings)).set_duration(1)
     
     # Add fade in for first number
     if start_time == 0:
@@ -329,7 +928,59 @@ def create_timer_clip(duration, start_time, settings):
     
     return combined_clip
 
-def create_qa_video(question, answer, settings, audio_clip=None):
+@functools.lru_cache(maxsize=32)
+def load_background_array(path, width, height):
+    """Decode a background image and resize it to the video size.
+
+    Cached per path and size, so each image is decoded once per process;
+    the array is shared and made read-only.
+    """
+    image = Image.open(path).convert('RGB')
+    if image.size == (width, height):
+        array = np.array(image)
+    elif cv2 is not None:
+        # INTER_AREA avoids aliasing when shrinking; INTER_LINEAR when growing
+        interpolation = cv2.INTER_AREA if image.width > width else cv2.INTER_LINEAR
+        array = cv2.resize(np.array(image), (width, height), interpolation=interpolation)
+    else:
+        array = np.array(image.resize((width, height), Image.BILINEAR))
+    array.setflags(write=False)
+    return array
+
+def make_color_array(rgb_color, width, height):
+    """Build a solid-color frame at the video size.
+
+    The frame is a read-only broadcast of one pixel, so it takes 3 bytes
+    instead of width * height * 3; compositing copies it before drawing.
+    """
+    return np.broadcast_to(np.array(rgb_color, dtype=np.uint8), (height, width, 3))
+
+def composite_static_frame(background_array, clip):
+    """Blend a static clip onto the background once and return the frame"""
+    background = ImageClip(background_array).set_duration(clip.duration)
+    return CompositeVideoClip([background, clip], use_bgclip=True).get_frame(0)
+
+def create_static_track(background_array, question_frame, answer_frame, q_duration, a_duration, fade_duration):
+    """Create the background and text of a question as one clip.
+
+    The question and answer text never move, so they are blended onto the
+    background once (see composite_static_frame) and each frame is one of
+    the two results. During a fade-in the frame is interpolated from the
+    background, which matches crossfadein on the text layer.
+    """
+    def make_frame(t):
+        if t < q_duration:
+            frame, fade_time = question_frame, t
+        else:
+            frame, fade_time = answer_frame, t - q_duration
+        if fade_duration <= 0 or fade_time >= fade_duration:
+            return frame
+        k = fade_time / fade_duration
+        return (background_array + k * (frame.astype(np.float32) - background_array)).astype(np.uint8)
+    
+    return VideoClip(make_frame, duration=q_duration + a_duration)
+
+def create_qa_video(question, answer, settings, audio_clip=None, background_array=None, timer_frames=None):
     # Get video dimensions and durations
     w = settings['video']['width']
     h = settings['video']['height']
@@ -339,35 +990,54 @@ def create_qa_video(question, answer, settings, audio_clip=None):
     
     try:
         # Create background based on settings
-        if ('background_image' in settings and 
+        if background_array is not None:
+            # Already decoded and resized once for the whole run; keep it
+            # uint8 so every frame read touches one byte per channel
+            assert background_array.dtype == np.uint8, background_array.dtype
+        elif ('background_image' in settings and 
             settings['background_image'] and 
             os.path.exists(settings['background_image'])):
             print(f"Using background image: {settings['background_image']}")
-            background = ImageClip(settings['background_image'])
-            if background.size != (w, h):
-                background = background.resize((w, h))
-            background = background.set_duration(total_duration)
+            background_array = load_background_array(settings['background_image'], w, h)
         else:
             print("Using color background")
-            hex_color = settings['background']['color']
-            rgb_color = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-            background = ColorClip(size=(w, h), color=rgb_color).set_duration(total_duration)
-        
-        # Create question and answer clips
-        question_clip = create_text_clip(question, q_duration, 'question', settings)
-        answer_clip = create_text_clip(answer, a_duration, 'answer', settings).set_start(q_duration)
+            background_array = make_color_array(settings['background']['_rgb'], w, h)
         
-        # Create base composite without timer
-        base_composite = CompositeVideoClip([background, question_clip, answer_clip], size=(w, h))
+        # Blend the question and answer onto the background once; the fade
+        # is applied by the static track
+        question_clip = create_text_clip(question, q_duration, 'question', settings, fade=False)
+        answer_clip = create_text_clip(answer, a_duration, 'answer', settings, fade=False)
+        static_track = create_static_track(
+            background_array,
+            composite_static_frame(background_array, question_clip),
+            composite_static_frame(background_array, answer_clip),
+            q_duration,
+            a_duration,
+            settings['transitions']['duration']
+        )
         
         # Create timer clips for question duration only
-        timer_clips = []
-        for i in range(q_duration):
-            timer = create_timer_clip(q_duration, i, settings)
-            timer_clips.append(timer.set_start(i))
-        
-        # Create final composite with timer on top
-        final_clip = CompositeVideoClip([base_composite] + timer_clips, size=(w, h))
+        if timer_frames is None:
+            timer_frames = prebuild_timer_frames(q_duration, settings)
+        if timer_frames is not None:
+            final_clip = create_countdown_clip(static_track, timer_frames, q_duration, settings)
+            tick_audio = create_tick_audio(q_duration, settings)
+            if tick_audio is not None:
+                final_clip = final_clip.set_audio(tick_audio)
+        else:
+            timer_clips = []
+            
+            # Build the timer shape and digits once, then reuse them for every tick
+            shape_type, shape_settings = get_timer_shape_settings(settings)
+            shape_clip = build_timer_shape(shape_type, shape_settings['size'], shape_settings['_rgb'])
+            digit_clips = {i: build_digit_clip(q_duration - i, settings) for i in range(q_duration)}
+            
+            for i in range(q_duration):
+                timer = create_timer_clip(q_duration, i, settings, shape_clip, digit_clips[i])
+                timer_clips.append(timer.set_start(i))
+            
+            # Only the timer is blended per frame, straight onto the static track
+            final_clip = CompositeVideoClip([static_track] + timer_clips, size=(w, h), use_bgclip=True)
         
         # Add audio if provided
         if audio_clip:
@@ -396,8 +1066,8 @@ def create_bookend_clip(settings, project_dir, clip_type='intro'):
             print(f"No {filename} found")
             return None
             
-        with open(clip_path, 'r') as file:
-            clip_settings = json.load(file)
+        with open(clip_path, 'rb') as file:
+            clip_settings = add_rgb_colors(_load_json(file))
             
         if not clip_settings.get('enabled', False):
             print(f"{clip_type.capitalize()} clip is disabled in settings")
@@ -411,20 +1081,13 @@ def create_bookend_clip(settings, project_dir, clip_type='intro'):
         
         # Create background
         if 'background' in clip_settings and clip_settings['background'].get('image'):
-            bg_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
-                                 clip_settings['background']['image'].lstrip('/'))
+            bg_path = os.path.join(ROOT_DIR, clip_settings['background']['image'].lstrip('/'))
             if os.path.exists(bg_path):
-                background = ImageClip(bg_path)
-                if background.size != (w, h):
-                    background = background.resize((w, h))
+                background = ImageClip(load_background_array(bg_path, w, h))
             else:
-                hex_color = clip_settings['background']['color']
-                rgb_color = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-                background = ColorClip(size=(w, h), color=rgb_color)
+                background = ImageClip(make_color_array(clip_settings['background']['_rgb'], w, h))
         else:
-            hex_color = clip_settings['background']['color']
-            rgb_color = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-            background = ColorClip(size=(w, h), color=rgb_color)
+            background = ImageClip(make_color_array(clip_settings['background']['_rgb'], w, h))
         
         background = background.set_duration(duration)
         
@@ -436,7 +1099,6 @@ def create_bookend_clip(settings, project_dir, clip_type='intro'):
             for image_config in clip_settings['images']:
                 try:
                     # Get image path relative to project directory first, then try root directory
-                    root_dir = os.path.dirname(os.path.abspath(__file__))
                     image_path = image_config['file']
                     
                     # First try project directory
@@ -447,7 +1109,7 @@ def create_bookend_clip(settings, project_dir, clip_type='intro'):
                         # Fallback to root directory
                         if image_path.startswith('/'):
                             image_path = image_path[1:]
-                        full_image_path = os.path.join(root_dir, image_path)
+                        full_image_path = os.path.join(ROOT_DIR, image_path)
                     
                     print(f"\nProcessing {clip_type} image:")
                     print(f"Original path: {image_config['file']}")
@@ -499,6 +1161,7 @@ def create_bookend_clip(settings, project_dir, clip_type='intro'):
                         'alignment': 'center',
                         'wrap_width': settings['text']['wrap_width']
                     },
+                    'font_directories': settings.get('font_directories', []),
                     'video': settings['video'],
                     'transitions': settings['transitions']
                 }
@@ -542,33 +1205,10 @@ def process_media_clip(clip, config, width, height, default_duration, settings):
     # Apply position if specified
     if 'position' in config:
         position = config['position']
-        x_setting = position.get('x', 'center')
-        y_setting = position.get('y', 'center')
-        padding = position.get('padding', 20)
-        
-        print(f"Positioning clip with settings: x={x_setting}, y={y_setting}, padding={padding}")
+        print(f"Positioning clip with settings: x={position.get('x', 'center')}, y={position.get('y', 'center')}, padding={position.get('padding', 20)}")
         print(f"Clip size: {clip.size}")
         
-        # Calculate x position
-        if x_setting == "center":
-            x_pos = 'center'
-        elif x_setting == "left":
-            x_pos = padding
-        elif x_setting == "right":
-            x_pos = width - clip.size[0] - padding
-        else:
-            x_pos = int(x_setting)
-        
-        # Calculate y position
-        if y_setting == "center":
-            y_pos = 'center'
-        elif y_setting == "top":
-            y_pos = padding
-        elif y_setting == "bottom":
-            y_pos = height - clip.size[1] - padding
-        else:
-            y_pos = int(y_setting)
-            
+        x_pos, y_pos = _resolve_xy(position, clip.size, (width, height))
         print(f"Final position: ({x_pos}, {y_pos})")
         clip = clip.set_position((x_pos, y_pos))
     
@@ -582,8 +1222,177 @@ def process_media_clip(clip, config, width, height, default_duration, settings):
     
     return clip
 
+def make_silence(duration, fps=44100):
+    """Create a silent stereo audio clip of the given duration"""
+    def make_frame(t):
+        if isinstance(t, np.ndarray):
+            return np.zeros((len(t), 2))
+        return [0, 0]
+    return AudioClip(make_frame, duration=duration, fps=fps)
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_has_encoder(name):
+    """Check whether the configured ffmpeg build includes an encoder"""
+    try:
+        result = subprocess.run(
+            [get_setting("FFMPEG_BINARY"), '-hide_banner', '-encoders'],
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+
+def pick_codec():
+    """Pick a hardware H.264 encoder when one is available, else libx264"""
+    if sys.platform == 'darwin' and platform.machine() == 'arm64' and ffmpeg_has_encoder('h264_videotoolbox'):
+        return 'h264_videotoolbox'
+    if shutil.which('nvidia-smi') and ffmpeg_has_encoder('h264_nvenc'):
+        return 'h264_nvenc'
+    return 'libx264'
+
+def get_encoder_options(settings):
+    """Return (codec, preset, ffmpeg_params) for encoding parts.
+
+    A missing or "auto" video codec picks a hardware encoder when available.
+    """
+    codec = settings['video'].get('codec', 'auto')
+    if codec == 'auto':
+        codec = pick_codec()
+    preset = settings['video'].get('preset', 'medium')
+    
+    if codec == 'libx264':
+        # Trivia frames are a static background with small text changes,
+        # which x264's stillimage tune encodes mostly as skip blocks
+        ffmpeg_params = ['-tune', 'stillimage', '-g', '300', '-bf', '0']
+    elif codec == 'h264_videotoolbox':
+        ffmpeg_params = ['-b:v', '8M', '-allow_sw', '1']
+    elif codec == 'h264_nvenc':
+        # NVENC has its own preset names (p1 fastest .. p7 slowest)
+        preset = 'p1'
+        ffmpeg_params = ['-tune', 'hq', '-rc', 'vbr', '-cq', '23']
+    else:
+        ffmpeg_params = None
+    return codec, preset, ffmpeg_params
+
+def write_clip(clip, output_path, settings, with_audio=True):
+    """Encode a clip to output_path using the project video settings.
+
+    With with_audio, clips without sound get a silent track so every part
+    has the same streams, which the ffmpeg concat demuxer requires. Parts
+    are also normalized to the project frame size and rate.
+    """
+    if with_audio and clip.audio is None:
+        clip = clip.set_audio(make_silence(clip.duration))
+    
+    # The stream-copy concat needs every part at the project size; the
+    # builders composite at that size, so this only catches regressions
+    size = (settings['video']['width'], settings['video']['height'])
+    if tuple(clip.size) != size:
+        print(f"Warning: resizing {os.path.basename(output_path)} from {clip.size} to {size}")
+        clip = clip.resize(size)
+    
+    # Every part carries the project frame rate, so the stream-copy concat
+    # joins parts with identical timing and nothing is resampled
+    clip = clip.set_fps(settings['video']['fps'])
+    
+    # Keep MoviePy's temporary audio file next to the output so parallel
+    # workers don't collide in the working directory. AAC rather than MP3:
+    # MP3 frames pad the audio past the video, which leaves timestamp gaps
+    # between parts in the stream-copy concat
+    temp_audiofile = os.path.splitext(output_path)[0] + '_TEMP_audio.m4a'
+    
+    codec, preset, ffmpeg_params = get_encoder_options(settings)
+    
+    clip.write_videofile(
+        output_path,
+        fps=clip.fps,
+        codec=codec,
+        preset=preset,
+        threads=settings['video'].get('threads'),
+        audio=with_audio,
+        audio_codec='aac',
+        temp_audiofile=temp_audiofile,
+        ffmpeg_params=ffmpeg_params,
+        write_logfile=False,
+        verbose=False
+    )
+
+def run_ffmpeg(args):
+    """Run the ffmpeg binary MoviePy is configured with"""
+    command = [get_setting("FFMPEG_BINARY"), '-y', '-loglevel', 'error'] + args
+    subprocess.run(command, check=True)
+
+def concat_videos(paths, output_path, work_dir, durations=None):
+    """Join encoded parts with ffmpeg's concat demuxer without re-encoding.
+
+    All parts must share size, frame rate and codec; write_clip takes care
+    of that for everything rendered from the same settings. durations, the
+    clip length of each part, start every part exactly where the previous
+    one ends, even if its audio runs a few milliseconds longer (audio is
+    stored in whole frames). The index is moved to the front (faststart)
+    so the output plays while streaming.
+    """
+    list_path = os.path.join(work_dir, 'concat.txt')
+    with open(list_path, 'w') as file:
+        for i, path in enumerate(paths):
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            file.write(f"file '{escaped}'\n")
+            if durations is not None:
+                file.write(f"duration {durations[i]}\n")
+    
+    run_ffmpeg(['-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', '-movflags', '+faststart', output_path])
+
+def mux_audio(video_path, audio_path, output_path, duration, loop=False, volume=None):
+    """Replace the audio of video_path with audio_path, copying the video stream.
+
+    Looping and volume are applied by ffmpeg while muxing, so the music is
+    never decoded or concatenated in Python.
+    """
+    audio_input = ['-stream_loop', '-1'] if loop else []
+    audio_filter = ['-af', f'volume={volume}'] if volume is not None else []
+    run_ffmpeg(
+        ['-i', video_path]
+        + audio_input + ['-i', audio_path]
+        + ['-map', '0:v', '-map', '1:a', '-c:v', 'copy']
+        + audio_filter + ['-c:a', 'aac']
+        + ['-t', str(duration), '-movflags', '+faststart', output_path]
+    )
+
+def _build_clip(args):
+    """Render one question to its own MP4 and return the file path.
+
+    Runs in a worker process; MoviePy clips hold file handles and lambdas
+    that don't pickle, so only the rendered file path is sent back.
+    """
+    index, question, answer, settings, work_dir, with_audio = args
+    print(f"Creating clip for question {index+1}")
+    
+    # Pick up the labels pre-rendered by main() when the worker was not
+    # forked with the service already running
+    text_dir = os.path.join(work_dir, 'text')
+    if _text_service is None and os.path.isdir(text_dir):
+        start_text_service(text_dir)
+    clip = create_qa_video(
+        question=clean_text(question),
+        answer=clean_text(answer),
+        settings=settings,
+        audio_clip=None
+    )
+    output_path = os.path.join(work_dir, f"qa_{index}.mp4")
+    try:
+        write_clip(clip, output_path, settings, with_audio)
+    finally:
+        # Free this question's frames before the worker takes the next one,
+        # so peak memory stays at one question's working set
+        clip.close()
+        del clip
+        gc.collect()
+    return output_path
+
 def main():
     try:
+        check_pillow_simd()
+        
         # Load settings and questions
         settings, questions_data, project_dir = load_settings()
         
@@ -648,66 +1457,116 @@ def main():
                 print(f"Preview mode enabled: Processing {len(questions)} questions")
                 print(f"Total duration will be: {total_with_end} seconds")
         
-        # Create video clips
-        clips = []
-        
-        # Add intro if present
-        if intro_clip:
-            print("Adding intro clip to video")
-            clips.append(intro_clip)
-        
-        # Add question clips
-        print("\nCreating question clips...")
-        for i, qa in enumerate(questions):
-            print(f"Creating clip for question {i+1}")
-            clip = create_qa_video(
-                question=clean_text(qa['question']),
-                answer=clean_text(qa['answer']),
-                settings=settings,
-                audio_clip=None
+        # Decode the background image once; forked workers inherit the
+        # load_background_array cache instead of receiving a full frame with
+        # every job, and spawned ones decode it on their first question
+        if settings.get('background_image') and os.path.exists(settings['background_image']):
+            print(f"Using background image: {settings['background_image']}")
+            load_background_array(
+                settings['background_image'],
+                settings['video']['width'],
+                settings['video']['height']
             )
-            clips.append(clip)
+        else:
+            print("Using color background")
         
-        # Add end clip if present
-        if end_clip:
-            print("Adding end clip to video")
-            clips.append(end_clip)
-            
-        print(f"Final video will have {len(clips)} clips")
+        # Composite the timer stamps once; forked workers inherit the cache and
+        # spawned ones fill their own on the first question
+        prebuild_timer_frames(settings['timing']['question_duration'], settings)
         
-        # Concatenate video clips
-        final_video = concatenate_videoclips(clips, method="compose")
+        # Pick the encoder once so every part (and worker) uses the same codec,
+        # which the stream-copy concat requires
+        if settings['video'].get('codec', 'auto') == 'auto':
+            settings['video']['codec'] = pick_codec()
+        print(f"Encoding with {settings['video']['codec']}")
         
-        # Add audio if specified
-        if 'audio' in settings and settings['audio'].get('file'):
-            try:
-                # Load audio file
-                audio = AudioFileClip(settings['audio']['file'])
-                
-                # Loop audio if needed
-                if settings['audio'].get('loop', False):
-                    total_duration = final_video.duration
-                    num_loops = int(np.ceil(total_duration / audio.duration))
-                    audio_clips = [audio] * num_loops
-                    audio = concatenate_audioclips(audio_clips).subclip(0, total_duration)
-                
-                # Set volume if specified
-                if 'volume' in settings['audio']:
-                    audio = audio.volumex(settings['audio']['volume'])
-                
-                # Combine audio with video
-                final_video = final_video.set_audio(audio)
+        # Split the cores between worker processes and their ffmpeg encoders,
+        # so workers times encoder threads roughly matches the core count
+        cpu_count = os.cpu_count() or 1
+        num_workers = settings['video'].get('num_workers') or min(len(questions), cpu_count)
+        num_workers = max(1, num_workers)
+        settings['video'].setdefault('threads', max(2, cpu_count // num_workers))
+        print(f"Rendering with {num_workers} workers, {settings['video']['threads']} encoder threads each")
+        
+        # Background music replaces the soundtrack of the parts. The parts
+        # still carry the timer ticks, so the output keeps them if adding
+        # the music fails
+        has_music = 'audio' in settings and bool(settings['audio'].get('file'))
+        if has_music and not os.path.isfile(settings['audio']['file']):
+            print(f"Warning: Could not add audio: {settings['audio']['file']} not found")
+            has_music = False
+        with_audio = settings['timer'].get('sound', {}).get('enabled', False)
+        
+        # Every part is encoded to its own file and joined with ffmpeg
+        with tempfile.TemporaryDirectory(prefix='trivia_', dir='.') as work_dir:
+            segment_paths = []
+            segment_durations = []
+            
+            # Add intro if present
+            if intro_clip:
+                print("Adding intro clip to video")
+                intro_path = os.path.join(work_dir, 'intro.mp4')
+                write_clip(intro_clip, intro_path, settings, with_audio)
+                intro_clip.close()
+                segment_paths.append(intro_path)
+                segment_durations.append(intro_clip.duration)
+            
+            # Labels in fonts that don't resolve to a file go through
+            # ImageMagick; render all of them up front in a single batch
+            if get_font_file(settings) is None:
+                service = start_text_service(os.path.join(work_dir, 'text'))
+                if service:
+                    prerender_texts(service, questions, settings)
+            
+            # Render each question to its own file in parallel
+            print("\nCreating question clips...")
+            jobs = [
+                (i, qa['question'], qa['answer'], settings, work_dir, with_audio)
+                for i, qa in enumerate(questions)
+            ]
+            with multiprocessing.Pool(num_workers) as pool:
+                segment_paths.extend(pool.map(_build_clip, jobs))
+            segment_durations += [
+                settings['timing']['question_duration'] + settings['timing']['answer_duration']
+            ] * len(jobs)
+            
+            # Add end clip if present
+            if end_clip:
+                print("Adding end clip to video")
+                end_path = os.path.join(work_dir, 'end.mp4')
+                write_clip(end_clip, end_path, settings, with_audio)
+                end_clip.close()
+                segment_paths.append(end_path)
+                segment_durations.append(end_clip.duration)
                 
-            except Exception as e:
-                print(f"Warning: Could not add audio: {str(e)}")
-        
-        # Write final video
-        final_video.write_videofile(
-            "output.mp4",
-            fps=settings['video']['fps'],
-            codec=settings['video'].get('codec', 'libx264'),
-            preset=settings['video'].get('preset', 'medium')
-        )
+            print(f"Final video will have {len(segment_paths)} clips")
+            
+            total_duration = (
+                (intro_clip.duration if intro_clip else 0)
+                + len(questions) * (settings['timing']['question_duration'] + settings['timing']['answer_duration'])
+                + (end_clip.duration if end_clip else 0)
+            )
+            
+            # Concatenate the parts without re-encoding, then add the music
+            # in a second pass that copies the video stream
+            if has_music:
+                video_path = os.path.join(work_dir, 'video.mp4')
+                concat_videos(segment_paths, video_path, work_dir, segment_durations)
+                try:
+                    mux_audio(
+                        video_path,
+                        settings['audio']['file'],
+                        "output.mp4",
+                        total_duration,
+                        loop=settings['audio'].get('loop', False),
+                        volume=settings['audio'].get('volume')
+                    )
+                except subprocess.CalledProcessError as e:
+                    # Ship the parts' own soundtrack (timer ticks) instead
+                    print(f"Warning: Could not add audio: {str(e)}")
+                    os.replace(video_path, "output.mp4")
+            else:
+                concat_videos(segment_paths, "output.mp4", work_dir, segment_durations)
         
     except Exception as e:
         print(f"Error in main: {str(e)}")